@@ -2,42 +2,195 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import openpyxl
+from openpyxl.utils import column_index_from_string as column_to_index
 import hashlib
 import os
 import json
 import sys
 import queue
 import contextlib
+import concurrent.futures
 import time
+import traceback
 import psutil
 from datetime import datetime
-from typing import Type
+from typing import Callable, Optional, Type
 
 try:
-    from selenium.common.exceptions import WebDriverException, TimeoutException
+    from selenium.common.exceptions import WebDriverException, TimeoutException, InvalidSessionIdException
 except Exception:
     # Placeholders para permitir execução em ambientes sem selenium (testes com fakes)
     class WebDriverException(Exception):
         pass
-    class TimeoutException(Exception):
+    class TimeoutException(WebDriverException):
+        pass
+    class InvalidSessionIdException(WebDriverException):
         pass
 
 from .interfaces import BaseAuthenticator, BaseExtractor, BaseStorage
 
 
-def column_to_index(col_letter: str) -> int:
-    index = 0
-    for char in col_letter.upper():
-        index = index * 26 + (ord(char) - ord('A') + 1)
-    return index
+LOGIN_LOG_EVENT = "<<LoginLog>>"
+SCRAPER_LOG_EVENT = "<<ScraperLog>>"
+LOG_HEARTBEAT_MS = 1000
+# Espera máxima do gerenciador de workers entre reconciliações sem aviso
+MANAGER_IDLE_TIMEOUT_S = 30
+# Intervalo mínimo entre lotes de login (evita relançar logins que falham rápido)
+LOGIN_BATCH_INTERVAL_S = 2
+# Intervalo mínimo entre atualizações do rótulo de status
+STATUS_UPDATE_INTERVAL_S = 0.25
+# Intervalo mínimo entre recálculos de velocidade/ETA
+ETA_UPDATE_INTERVAL_S = 1.0
+# Tentativas por tarefa após erros do navegador, e espera base entre elas (dobra a cada falha)
+MAX_TASK_ATTEMPTS = 3
+TASK_RETRY_BACKOFF_S = 2
+# Tentativas de regravar lotes que falharam ao encerrar a escrita
+FINAL_SAVE_ATTEMPTS = 3
+FINAL_SAVE_RETRY_DELAY_S = 2
+# Limite de linhas mantidas em cada área de log
+LOG_MAX_LINES = 2000
+
+
+def hash_file(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """Calcula o SHA-256 do arquivo lendo em blocos (sem carregá-lo inteiro)."""
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+        return h.hexdigest()
+
+
+def format_code(value) -> str:
+    """Normaliza o valor da célula de código para 10 dígitos.
+
+    Células numéricas chegam como int/float; `str(12345.0)` geraria
+    "12345.0", então inteiros são formatados diretamente. Valores numéricos
+    <= 0 não são códigos válidos e retornam "" (célula ignorada).
+    """
+    if value is None or isinstance(value, bool):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int):
+        return f"{value:010d}" if value > 0 else ""
+    code = str(value).strip()
+    if code.isdigit():
+        code = code.zfill(10)
+    return code
+
+
+class NotifyingQueue(queue.Queue):
+    """Fila que chama `notify` quando passa a ter itens a esvaziar.
+
+    Usada para as filas de log: produtores (workers, autenticador, extrator)
+    continuam usando apenas `put`, e a GUI é avisada sem precisar fazer polling.
+    O aviso é agrupado: só o `put` que encontra a fila sem esvaziamento
+    pendente chama `notify`; o consumidor chama `clear_drain_pending()` antes
+    de esvaziá-la.
+    """
+
+    def __init__(self, notify=None, maxsize=0):
+        super().__init__(maxsize)
+        self.notify = notify
+        self._drain_pending = False
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        with self.mutex:
+            if self._drain_pending:
+                return
+            self._drain_pending = True
+        if self.notify:
+            self.notify()
+
+    def clear_drain_pending(self):
+        with self.mutex:
+            self._drain_pending = False
+
+
+class TaskQueue(queue.Queue):
+    """Fila de tarefas limitada que aceita sentinelas e devoluções fora do limite.
+
+    `put_sentinels` e `requeue` inserem no início da fila sem bloquear, mesmo
+    com a fila cheia, para que um worker ocioso receba o item imediatamente.
+    """
+
+    def requeue(self, task):
+        with self.mutex:
+            self.queue.appendleft(task)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def put_sentinels(self, count: int):
+        if count <= 0:
+            return
+        with self.mutex:
+            for _ in range(count):
+                self.queue.appendleft(None)
+            self.unfinished_tasks += count
+            self.not_empty.notify(count)
+
+
+class DriverPidRegistry:
+    """Conjunto thread-safe dos PIDs dos drivers abertos pelos workers.
+
+    `seen` indica se algum PID já foi registrado; quando a sessão do
+    autenticador não expõe o processo do driver, a limpeza precisa recorrer
+    à varredura de processos.
+    """
+
+    def __init__(self):
+        self._pids = set()
+        self._lock = threading.Lock()
+        self.seen = False
+
+    def add(self, pid: int):
+        with self._lock:
+            self._pids.add(pid)
+            self.seen = True
+
+    def discard(self, pid: int):
+        with self._lock:
+            self._pids.discard(pid)
+
+    def drain(self) -> list:
+        with self._lock:
+            pids = list(self._pids)
+            self._pids.clear()
+        return pids
+
+
+class LoginLatch:
+    """Contador regressivo dos logins de um lote de workers.
+
+    Cada worker chama `count_down()` uma vez ao terminar a tentativa de login;
+    o gerenciador aguarda em `wait()` até o contador chegar a zero.
+    """
+
+    def __init__(self, count: int):
+        self._count = count
+        self._cv = threading.Condition()
+
+    def count_down(self):
+        with self._cv:
+            self._count -= 1
+            if self._count <= 0:
+                self._cv.notify_all()
+
+    def wait(self):
+        with self._cv:
+            self._cv.wait_for(lambda: self._count <= 0)
 
 
 class ScraperWorker(threading.Thread):
-    def __init__(self, worker_id, headless_mode, login_event, authenticator: BaseAuthenticator, extractor: BaseExtractor, task_queue: queue.Queue, results_queue: queue.Queue, global_stop_event: threading.Event, login_log_queue: queue.Queue, scraper_log_queue: queue.Queue):
+    def __init__(self, worker_id, headless_mode, login_latch: LoginLatch, authenticator: BaseAuthenticator, extractor: BaseExtractor, task_queue: queue.Queue, results_queue: queue.Queue, global_stop_event: threading.Event, login_log_queue: queue.Queue, scraper_log_queue: queue.Queue, on_exit: Optional[Callable] = None, driver_pids: Optional[DriverPidRegistry] = None):
         super().__init__(daemon=True)
         self.worker_id = worker_id
         self.headless = headless_mode
-        self.login_event = login_event
+        self.login_latch = login_latch
+        self._login_signalled = False
         self._stop_event = threading.Event()
 
         self.authenticator = authenticator
@@ -47,6 +200,11 @@ class ScraperWorker(threading.Thread):
         self.global_stop_event = global_stop_event
         self.login_log_queue = login_log_queue
         self.scraper_log_queue = scraper_log_queue
+        self.on_exit = on_exit
+        # True quando o worker saiu por ter recebido uma sentinela
+        self.retired = False
+        self.driver_pids = driver_pids
+        self.driver_pid = None
 
         if hasattr(self.extractor, 'log_queue'):
             self.extractor.log_queue = self.scraper_log_queue
@@ -60,10 +218,80 @@ class ScraperWorker(threading.Thread):
     def _log_login(self, msg):
         self.login_log_queue.put(msg)
 
+    def _track_driver(self, driver):
+        # Selenium expõe o processo do chromedriver em driver.service.process
+        pid = getattr(getattr(getattr(driver, 'service', None), 'process', None), 'pid', None)
+        self.driver_pid = pid
+        if pid and self.driver_pids is not None:
+            self.driver_pids.add(pid)
+
+    def _untrack_driver(self):
+        if self.driver_pid and self.driver_pids is not None:
+            self.driver_pids.discard(self.driver_pid)
+        self.driver_pid = None
+
+    def _logout(self, driver):
+        try:
+            self.authenticator.logout(driver)
+        except Exception:
+            # Encerramento falhou: o PID continua registrado para o cleanup matar o driver
+            self.driver_pid = None
+            return
+        self._untrack_driver()
+
+    def _signal_login_done(self):
+        if not self._login_signalled:
+            self._login_signalled = True
+            self.login_latch.count_down()
+
+    @staticmethod
+    def _task_label(task) -> str:
+        if isinstance(task, dict):
+            return f"linha {task.get('row_num')} ({task.get('code')})"
+        return str(task)
+
+    def _retry_task(self, task, attempt: int, reason: str, backoff: bool = True):
+        """Agenda nova tentativa da tarefa, com espera crescente entre tentativas.
+
+        Retorna a tarefa a refazer, ou None quando o limite de tentativas foi
+        atingido: a tarefa não é salva e volta a ser processada ao continuar
+        o trabalho numa próxima execução.
+        """
+        if attempt >= MAX_TASK_ATTEMPTS:
+            self._log_login(f"❌ [Worker {self.worker_id}] {reason}: tarefa {self._task_label(task)} falhou {attempt} vez(es); ignorada nesta execução.")
+            return None
+        self._log_login(f"⚠️ [Worker {self.worker_id}] {reason}: refazendo tarefa {self._task_label(task)} (tentativa {attempt + 1}/{MAX_TASK_ATTEMPTS}).")
+        if backoff:
+            self.global_stop_event.wait(TASK_RETRY_BACKOFF_S * 2 ** (attempt - 1))
+        return task
+
+    def _hand_back_task(self, task):
+        """Devolve à fila uma tarefa não concluída, sem bloquear o encerramento."""
+        if self.global_stop_event.is_set():
+            self._log_login(f"⚠️ [Worker {self.worker_id}] Tarefa {self._task_label(task)} não concluída (processamento interrompido).")
+            return
+        self.task_queue.requeue(task)
+
+    @staticmethod
+    def _session_alive(driver) -> bool:
+        """Verifica se a sessão do driver ainda responde a um comando simples."""
+        if driver is None or getattr(driver, 'session_id', None) is None:
+            return False
+        try:
+            driver.current_window_handle
+            return True
+        except Exception:
+            return False
+
     def run(self):
         self._log_login(f"[Worker {self.worker_id}] Iniciando...")
         driver = None
         login_success = False
+        # Tarefa que falhou por erro do navegador; é refeita por este worker
+        # (com o mesmo driver ou após novo login), em vez de voltar para a
+        # fila (que é limitada).
+        pending_task = None
+        task_attempts = 0
 
         try:
             self._log_login(f"[Worker {self.worker_id}] Tentando fazer login...")
@@ -73,44 +301,70 @@ class ScraperWorker(threading.Thread):
                 driver = self.authenticator.login()
 
             if driver:
+                self._track_driver(driver)
                 self._log_login(f"[Worker {self.worker_id}] ✅ Login bem-sucedido.")
                 login_success = True
             else:
                 self._log_login(f"[Worker {self.worker_id}] ❌ Falha no login.")
 
-            self.login_event.set()
+            self._signal_login_done()
 
             if not login_success:
                 return
 
             while not self.global_stop_event.is_set() and not self.stopped():
                 try:
-                    task = self.task_queue.get(timeout=1)
+                    if pending_task is not None:
+                        task, pending_task = pending_task, None
+                    else:
+                        task = self.task_queue.get()
+                        task_attempts = 0
+                    if task is None:
+                        # Sentinela: redução de workers ou parada global
+                        self.retired = True
+                        break
                     data = self.extractor.extract(driver, task)
                     self.results_queue.put(data)
                     self.task_queue.task_done()
 
-                except queue.Empty:
+                except TimeoutException:
+                    # Lentidão pontual: a sessão continua válida, refaz a tarefa no mesmo driver
+                    task_attempts += 1
+                    pending_task = self._retry_task(task, task_attempts, "Timeout")
                     continue
-                except (WebDriverException, TimeoutException) as e:
+                except WebDriverException as e:
+                    task_attempts += 1
+                    session_lost = isinstance(e, InvalidSessionIdException) or not self._session_alive(driver)
+                    if not session_lost:
+                        pending_task = self._retry_task(task, task_attempts, type(e).__name__)
+                        continue
+                    pending_task = self._retry_task(task, task_attempts, type(e).__name__, backoff=False)
                     self._log_login(f"🚨 [Worker {self.worker_id}] Erro no navegador: {type(e).__name__}. Reiniciando driver.")
-                    self.task_queue.put(task)
                     if driver:
-                        with contextlib.suppress(Exception): self.authenticator.logout(driver)
+                        self._logout(driver)
                     driver = None
                     while not driver and not self.global_stop_event.is_set() and not self.stopped():
                         self._log_login(f"[Worker {self.worker_id}] Retentando login...")
                         driver = self.authenticator.login()
-                        if not driver:
+                        if driver:
+                            self._track_driver(driver)
+                        else:
                             time.sleep(30)
                     continue
 
         except Exception as e:
             self._log_login(f"🚨 [Worker {self.worker_id}] Erro crítico: {e}")
         finally:
+            # Garante a contagem mesmo se o login lançar exceção, para não
+            # deixar o gerenciador esperando indefinidamente.
+            self._signal_login_done()
             if driver:
-                with contextlib.suppress(Exception): self.authenticator.logout(driver)
+                self._logout(driver)
+            if pending_task is not None:
+                self._hand_back_task(pending_task)
             self._log_login(f"[Worker {self.worker_id}] Finalizado.")
+            if self.on_exit:
+                self.on_exit(self)
 
 
 class FrameworkGUI(tk.Tk):
@@ -124,15 +378,24 @@ class FrameworkGUI(tk.Tk):
         self.storage_class = storage_class
         self.config = config
 
-        self.login_log_queue = queue.Queue()
-        self.scraper_log_queue = queue.Queue()
+        self.login_log_queue = NotifyingQueue(lambda: self.notify_log(LOGIN_LOG_EVENT))
+        self.scraper_log_queue = NotifyingQueue(lambda: self.notify_log(SCRAPER_LOG_EVENT))
 
         self.stop_event = threading.Event()
-        self.tasks_queue = queue.Queue()
+        self.tasks_queue = TaskQueue()
         self.results_queue = queue.Queue()
-        self.unsaved_data = []
+        self._reset_unsaved(self.config.get("engine_settings", {}).get("save_interval", 15))
+        self.save_queue = queue.Queue()
+        self.writer_thread = None
         self.worker_threads = []
         self.threads_lock = threading.Lock()
+        self.active_workers = 0
+        # Sentinelas de redução já enviadas e ainda não consumidas
+        self._pending_retirements = 0
+        self._last_status = 0.0
+        self.manager_cv = threading.Condition()
+        self.driver_pids = DriverPidRegistry()
+        self._manager_wakeup = False
 
         self.total_items = 0
         self.saved_items_count = 0
@@ -141,14 +404,28 @@ class FrameworkGUI(tk.Tk):
         self.num_workers_var = tk.IntVar(value=default_workers)
         default_headless = self.config.get("engine_settings", {}).get("headless_mode", True)
         self.headless_var = tk.BooleanVar(value=default_headless)
+        # Último alvo válido, lido pelas threads sem acessar a variável Tk
+        self.target_workers = default_workers
+        self.num_workers_var.trace_add('write', self._on_num_workers_changed)
 
         self.create_widgets()
-        self.process_login_log_queue()
-        self.process_scraper_log_queue()
+        self.bind(LOGIN_LOG_EVENT, lambda e: self.process_login_log_queue())
+        self.bind(SCRAPER_LOG_EVENT, lambda e: self.process_scraper_log_queue())
+        self._log_heartbeat()
 
     def log(self, message):
         self.login_log_queue.put(message)
 
+    def notify_log(self, sequence):
+        """Agenda o esvaziamento de uma fila de log no loop do Tk.
+
+        `event_generate(..., when="tail")` pode ser chamado a partir de
+        qualquer thread, mas espera o loop principal atendê-lo; por isso
+        NotifyingQueue só chama este método uma vez por esvaziamento pendente.
+        """
+        with contextlib.suppress(tk.TclError, RuntimeError):
+            self.event_generate(sequence, when="tail")
+
     def create_widgets(self):
         file_frame = ttk.LabelFrame(self, text="Controle de Arquivos", padding=10)
         file_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -215,17 +492,23 @@ class FrameworkGUI(tk.Tk):
         ttk.Label(ctrl_frame, textvariable=self.speed_var, font=('Arial', 10, 'italic')).pack(side=tk.RIGHT, padx=5)
 
     def process_log_queue(self, log_queue, area):
+        # Limpa antes de esvaziar: um put feito durante o esvaziamento gera novo aviso
+        log_queue.clear_drain_pending()
+        buf = []
         try:
             while True:
-                message = log_queue.get_nowait()
-                area.config(state='normal')
-                area.insert(tk.END, str(message) + "\n")
-                area.see(tk.END)
-                area.config(state='disabled')
+                buf.append(str(log_queue.get_nowait()))
         except queue.Empty:
             pass
-        finally:
-            self.after(100, lambda: self.process_log_queue(log_queue, area))
+        if not buf:
+            return
+        area.config(state='normal')
+        area.insert(tk.END, "\n".join(buf) + "\n")
+        line_count = int(area.index('end-1c').split('.')[0])
+        if line_count > LOG_MAX_LINES:
+            area.delete('1.0', f'{line_count - LOG_MAX_LINES}.0')
+        area.see(tk.END)
+        area.config(state='disabled')
 
     def process_login_log_queue(self):
         self.process_log_queue(self.login_log_queue, self.login_log_area)
@@ -233,17 +516,24 @@ class FrameworkGUI(tk.Tk):
     def process_scraper_log_queue(self):
         self.process_log_queue(self.scraper_log_queue, self.scraper_log_area)
 
+    def _log_heartbeat(self):
+        # Rede de segurança: as filas são esvaziadas pelos eventos virtuais,
+        # mas uma notificação perdida não deve deixar mensagens presas.
+        self.process_login_log_queue()
+        self.process_scraper_log_queue()
+        self.after(LOG_HEARTBEAT_MS, self._log_heartbeat)
+
     def select_input_file(self):
         file_path = filedialog.askopenfilename(title="Selecione o arquivo Excel de entrada", filetypes=[("Arquivos Excel", "*.xlsx *.xls")])
         if file_path:
             try:
                 self.input_file = file_path
                 self.input_label.config(text=os.path.basename(file_path))
-                self.input_hash = hashlib.sha256(open(file_path, "rb").read()).hexdigest()
+                self.input_hash = None
+                threading.Thread(target=self._compute_input_hash, args=(file_path,), daemon=True).start()
 
-                wb = openpyxl.load_workbook(file_path, read_only=True)
-                sheets = wb.sheetnames
-                wb.close()
+                with contextlib.closing(openpyxl.load_workbook(file_path, read_only=True, data_only=True)) as wb:
+                    sheets = wb.sheetnames
                 selected = self.ask_sheet_selection(sheets)
                 if selected:
                     self.selected_sheet = selected
@@ -251,6 +541,28 @@ class FrameworkGUI(tk.Tk):
             except Exception as e:
                 messagebox.showerror("Erro", f"Não foi possível ler o arquivo:\n{str(e)}")
 
+    def _compute_input_hash(self, file_path):
+        try:
+            digest = hash_file(file_path)
+        except OSError as e:
+            self.log(f"Erro ao calcular hash do arquivo de entrada: {e}")
+            self.after(0, lambda err=e: self._input_hash_failed(file_path, err))
+            return
+        self.after(0, lambda: self._set_input_hash(file_path, digest))
+
+    def _input_hash_failed(self, file_path, error):
+        if getattr(self, 'input_file', None) != file_path:
+            return
+        # Força uma nova seleção: sem hash não é possível iniciar o processamento
+        del self.input_file
+        self.input_label.config(text="Nenhum arquivo selecionado")
+        messagebox.showerror("Erro", f"Não foi possível ler o arquivo:\n{error}")
+
+    def _set_input_hash(self, file_path, digest):
+        # Ignora resultados de um arquivo que já foi substituído por outra seleção
+        if getattr(self, 'input_file', None) == file_path:
+            self.input_hash = digest
+
     def ask_sheet_selection(self, sheets):
         popup = tk.Toplevel(self)
         popup.title("Selecionar Planilha")
@@ -284,6 +596,9 @@ class FrameworkGUI(tk.Tk):
         if not hasattr(self, 'input_file') or not hasattr(self, 'output_file') or not hasattr(self, 'selected_sheet'):
             messagebox.showwarning("Aviso", "Configure os arquivos de entrada, saída e a planilha.")
             return
+        if not getattr(self, 'input_hash', None):
+            messagebox.showwarning("Aviso", "Aguarde o fim da leitura do arquivo de entrada.")
+            return
 
         try:
             self.authenticator = self.authenticator_class(self.config['credentials'], self.headless_var.get(), log_queue=self.login_log_queue)
@@ -320,21 +635,43 @@ class FrameworkGUI(tk.Tk):
 
         threading.Thread(target=self.run_scraping, daemon=True).start()
 
-    def _worker_manager(self):
+    def _on_num_workers_changed(self, *_):
+        try:
+            value = self.num_workers_var.get()
+        except tk.TclError:
+            # Campo vazio/incompleto durante a digitação: mantém o último alvo válido
+            return
+        self.target_workers = max(0, value)
+        self._notify_manager()
+
+    def _notify_manager(self):
+        """Acorda o gerenciador de workers (mudança de alvo, saída de worker ou parada)."""
+        with self.manager_cv:
+            self._manager_wakeup = True
+            self.manager_cv.notify_all()
+
+    def _on_worker_exit(self, worker):
+        with self.threads_lock:
+            self.active_workers -= 1
+            if worker.retired and self._pending_retirements > 0:
+                self._pending_retirements -= 1
+        self._notify_manager()
+
+    def _worker_manager(self, login_batch_size: int):
         """
         Gerencia o pool de workers com login em lotes e ajuste dinâmico.
         """
         worker_serial_id = 0
-        login_batch_size = self.config.get("engine_settings", {}).get("login_batch_size", 3)
         self.log(f"MANAGER: Iniciando logins em lotes de {login_batch_size}.")
 
         while not self.stop_event.is_set():
+            login_latch = None
             with self.threads_lock:
                 # Remove threads que já terminaram da lista
                 self.worker_threads = [t for t in self.worker_threads if t.is_alive()]
                 
-                target_workers = self.num_workers_var.get()
-                current_workers = len(self.worker_threads)
+                target_workers = self.target_workers
+                current_workers = max(0, len(self.worker_threads) - self._pending_retirements)
                 
                 # Adiciona workers se necessário, em lotes
                 if current_workers < target_workers:
@@ -343,32 +680,37 @@ class FrameworkGUI(tk.Tk):
                     batch_size = min(needed, login_batch_size)
                     self.log(f"MANAGER: Iniciando um lote de {batch_size} novo(s) worker(s).")
                     
-                    login_events = []
+                    login_latch = LoginLatch(batch_size)
                     for _ in range(batch_size):
                         worker_serial_id += 1
-                        login_event = threading.Event()
-                        login_events.append(login_event)
-                        worker = ScraperWorker(worker_serial_id, self.headless_var.get(), login_event, self.authenticator, self.extractor, self.tasks_queue, self.results_queue, self.stop_event, self.login_log_queue, self.scraper_log_queue)
+                        worker = ScraperWorker(worker_serial_id, self.headless_var.get(), login_latch, self.authenticator, self.extractor, self.tasks_queue, self.results_queue, self.stop_event, self.login_log_queue, self.scraper_log_queue, on_exit=self._on_worker_exit, driver_pids=self.driver_pids)
                         worker.start()
                         self.worker_threads.append(worker)
-
-                    # Espera que todos os logins do lote terminem
-                    self.log(f"MANAGER: Aguardando resultado do login do lote de {batch_size} worker(s)...")
-                    for event in login_events:
-                        event.wait()
-                    self.log("MANAGER: Lote de logins concluído.")
+                        self.active_workers += 1
                 
                 # Remove workers se necessário
                 elif current_workers > target_workers:
                     to_remove = current_workers - target_workers
                     self.log(f"MANAGER: Sinalizando para remover {to_remove} worker(s).")
                     
-                    # Pega os últimos workers da lista para parar
-                    workers_to_stop = self.worker_threads[target_workers:]
-                    for worker in workers_to_stop:
-                        worker.stop()
-
-            time.sleep(2)
+                    # Uma sentinela por worker a remover; o primeiro worker
+                    # ocioso que a receber encerra, mesmo com a fila vazia.
+                    self._pending_retirements += to_remove
+                    self.tasks_queue.put_sentinels(to_remove)
+
+            if login_latch is not None:
+                # Espera que todos os logins do lote terminem, fora do lock para
+                # não bloquear quem só precisa consultar/atualizar os workers
+                self.log(f"MANAGER: Aguardando resultado do login do lote de {batch_size} worker(s)...")
+                login_latch.wait()
+                self.log("MANAGER: Lote de logins concluído.")
+                # Reavalia logo após o lote, respeitando o intervalo mínimo entre logins
+                self.stop_event.wait(LOGIN_BATCH_INTERVAL_S)
+                continue
+
+            with self.manager_cv:
+                self.manager_cv.wait_for(lambda: self._manager_wakeup or self.stop_event.is_set(), timeout=MANAGER_IDLE_TIMEOUT_S)
+                self._manager_wakeup = False
         
         # Ao final do processo, sinaliza para todos os workers pararem
         with self.threads_lock:
@@ -379,75 +721,96 @@ class FrameworkGUI(tk.Tk):
     def run_scraping(self):
         try:
             self.log("\n=== INICIANDO PROCESSAMENTO ===")
-            self.tasks_queue = queue.Queue()
+            engine = self.config.get("engine_settings", {})
+            save_interval = engine.get("save_interval", 15)
+            self._reset_unsaved(save_interval)
+            login_batch_size = engine.get("login_batch_size", 3)
+            self._pending_retirements = 0
+            self.tasks_queue = TaskQueue(maxsize=max(64, 4 * self.target_workers))
             self.results_queue = queue.Queue()
+            self.save_queue = queue.Queue()
+            self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self.writer_thread.start()
 
             code_column_letter = self.config['excel_input']['code_column']
             self.log(f"Lendo códigos da coluna {code_column_letter}.")
             
-            wb_input = openpyxl.load_workbook(self.input_file, read_only=True)
-            sheet_input = wb_input[self.selected_sheet]
-            
             all_valid_tasks = []
             code_col_idx = column_to_index(code_column_letter) - 1
 
-            for row in sheet_input.iter_rows(min_row=2): 
-                cell = row[code_col_idx]
-                if cell.value and str(cell.value).strip():
-                    all_valid_tasks.append({'code': str(cell.value).zfill(10), 'row_num': cell.row})
-
-            wb_input.close()
+            # data_only: lê o valor em cache das fórmulas, não o texto da fórmula
+            with contextlib.closing(openpyxl.load_workbook(self.input_file, read_only=True, data_only=True)) as wb_input:
+                sheet_input = wb_input[self.selected_sheet]
+                code_cells = sheet_input.iter_rows(min_row=2, min_col=code_col_idx + 1, max_col=code_col_idx + 1, values_only=True)
+                for row_num, (value,) in enumerate(code_cells, start=2):
+                    code = format_code(value)
+                    if code:
+                        all_valid_tasks.append({'code': code, 'row_num': row_num, 'row_key': str(row_num)})
             
             self.total_items = len(all_valid_tasks)
-            tasks_to_run = [task for task in all_valid_tasks if str(task['row_num']) not in self.storage.processed_ids]
+            processed = self.storage.processed_ids
+            if not isinstance(processed, (set, frozenset)):
+                processed = set(processed)
+            tasks_to_run = [task for task in all_valid_tasks if task['row_key'] not in processed]
             
             self.log(f"{len(tasks_to_run)} tarefas novas para processar.")
-            for task in tasks_to_run:
-                self.tasks_queue.put(task)
+            threading.Thread(target=self._feed_tasks, args=(tasks_to_run,), daemon=True).start()
 
             self.progress["maximum"] = len(tasks_to_run)
             self.progress_label.config(text=f"0/{len(tasks_to_run)}")
             
-            manager_thread = threading.Thread(target=self._worker_manager, daemon=True)
+            manager_thread = threading.Thread(target=self._worker_manager, args=(login_batch_size,), daemon=True)
             manager_thread.start()
 
-            start_time = time.time()
+            start_time = time.monotonic()
+            self._last_eta_update = 0.0
             items_processed_session = 0
             while not self.stop_event.is_set():
                 try:
-                    data = self.results_queue.get(timeout=1)
-                    if data:
-                        self.unsaved_data.append(data)
-                        
-                        if len(self.unsaved_data) >= self.config.get("engine_settings", {}).get("save_interval", 15):
-                            self.save_data()
-                        
-                        items_processed_session += 1
+                    batch = [self.results_queue.get(timeout=1)]
+                    # Consome tudo que já está pronto e atualiza a UI uma vez por lote
+                    with contextlib.suppress(queue.Empty):
+                        while True:
+                            batch.append(self.results_queue.get_nowait())
+
+                    new_items = 0
+                    for data in batch:
+                        if data:
+                            self.unsaved_buf[self.unsaved_idx] = data
+                            self.unsaved_idx += 1
+                            new_items += 1
+                            if self.unsaved_idx >= len(self.unsaved_buf):
+                                self.save_data()
+
+                    if new_items:
+                        items_processed_session += new_items
                         total_processed_overall = self.saved_items_count + items_processed_session
 
-                        elapsed = time.time() - start_time
-                        if elapsed > 2:
-                            speed = items_processed_session / elapsed * 60
-                            self.speed_var.set(f"{speed:.1f} itens/min")
+                        now = time.monotonic()
+                        elapsed = now - start_time
+                        if elapsed > 2 and now - self._last_eta_update >= ETA_UPDATE_INTERVAL_S:
+                            self._last_eta_update = now
+                            self.speed_var.set(f"{items_processed_session * 60 / elapsed:.1f} itens/min")
                             remaining = len(tasks_to_run) - items_processed_session
-                            if speed > 0 and remaining > 0:
-                                eta_seconds = remaining / (speed / 60)
-                                h, m, s = int(eta_seconds // 3600), int((eta_seconds % 3600) // 60), int(eta_seconds % 60)
+                            if remaining > 0:
+                                eta_seconds = int(remaining * elapsed / items_processed_session)
+                                h, rem = divmod(eta_seconds, 3600)
+                                m, s = divmod(rem, 60)
                                 self.eta_var.set(f"ETA: {h:02d}:{m:02d}:{s:02d}")
                         
                         self.progress_var.set(items_processed_session)
                         self.progress_label.config(text=f"{items_processed_session}/{len(tasks_to_run)}")
                         
-                        with self.threads_lock:
-                            active_workers = len([t for t in self.worker_threads if t.is_alive()])
-                        target_workers = self.num_workers_var.get()
-                        self.status_var.set(f"Processando... | Salvos: {total_processed_overall} | Workers: {active_workers}/{target_workers}")
+                        if now - self._last_status > STATUS_UPDATE_INTERVAL_S:
+                            self._last_status = now
+                            active_workers = self.active_workers
+                            target_workers = self.target_workers
+                            self.status_var.set(f"Processando... | Salvos: {total_processed_overall} | Workers: {active_workers}/{target_workers}")
 
                 except queue.Empty:
                     if self.tasks_queue.empty():
-                        with self.threads_lock:
-                            active_workers = len([t for t in self.worker_threads if t.is_alive()])
-                        target_workers = self.num_workers_var.get()
+                        active_workers = self.active_workers
+                        target_workers = self.target_workers
                         
                         if active_workers == 0 and target_workers == 0:
                             self.log("Fila vazia, nenhum worker ativo e target=0. Finalizando processamento.")
@@ -458,13 +821,12 @@ class FrameworkGUI(tk.Tk):
                             continue
                     time.sleep(0.5)
             
-            if self.unsaved_data:
+            if self.unsaved_idx:
                 self.save_data()
             self.log("\nPROCESSAMENTO CONCLUÍDO." if not self.stop_event.is_set() else "\nProcessamento interrompido.")
             
         except Exception as e:
             self.log(f"\nERRO DURANTE PROCESSAMENTO: {e}")
-            import traceback
             self.log(traceback.format_exc())
         finally:
             self.cleanup()
@@ -475,22 +837,97 @@ class FrameworkGUI(tk.Tk):
             self.workers_spinbox.config(state='normal')
             self.headless_check.config(state='normal')
 
+    def _reset_unsaved(self, capacity: int):
+        # Buffer de tamanho fixo (save_interval) preenchido por índice
+        self.unsaved_buf = [None] * max(1, capacity)
+        self.unsaved_idx = 0
+
     def save_data(self):
-        if not self.unsaved_data:
+        """Entrega os itens pendentes para a thread de escrita."""
+        if not self.unsaved_idx:
             return
-        self.log(f"Salvando lote de {len(self.unsaved_data)} itens...")
+        if self.unsaved_idx == len(self.unsaved_buf):
+            batch = self.unsaved_buf
+        else:
+            batch = self.unsaved_buf[:self.unsaved_idx]
+        self.save_queue.put(batch)
+        self._reset_unsaved(len(self.unsaved_buf))
+
+    def _writer_loop(self):
+        """Grava os lotes de `save_queue` até receber a sentinela `None` e fecha o storage.
+
+        Lotes que falharem (ex.: arquivo de saída aberto no Excel) são mantidos
+        e regravados junto com o próximo lote e, por fim, no encerramento.
+        """
+        failed = []
+        while True:
+            batch = self.save_queue.get()
+            if batch is None:
+                break
+            if failed:
+                batch = failed + list(batch)
+            failed = [] if self._save_batch(batch) else batch
+
+        for attempt in range(1, FINAL_SAVE_ATTEMPTS + 1):
+            if not failed:
+                break
+            self.log(f"Regravando {len(failed)} itens pendentes (tentativa {attempt}/{FINAL_SAVE_ATTEMPTS})...")
+            if self._save_batch(failed):
+                failed = []
+            elif attempt < FINAL_SAVE_ATTEMPTS:
+                time.sleep(FINAL_SAVE_RETRY_DELAY_S)
+        if failed:
+            self.log(f"ERRO: {len(failed)} itens não puderam ser salvos.")
+
+        if getattr(self, 'storage', None):
+            with contextlib.suppress(Exception):
+                self.storage.close()
+
+    def _stop_writer(self):
+        """Envia a sentinela e aguarda a gravação dos lotes restantes."""
+        self.save_queue.put(None)
+        writer = self.writer_thread
+        if writer and writer.is_alive():
+            writer.join()
+        else:
+            # Sem thread de escrita ativa: grava o restante e fecha aqui mesmo
+            self._writer_loop()
+
+    def _save_batch(self, batch) -> bool:
+        """Grava um lote no storage; retorna False se a gravação falhar."""
+        self.log(f"Salvando lote de {len(batch)} itens...")
         try:
-            self.storage.save_items(self.unsaved_data)
-            self.saved_items_count += len(self.unsaved_data)
-            self.unsaved_data = []
+            self.storage.save_items(batch)
+            self.saved_items_count += len(batch)
             self.log(f"Lote salvo com sucesso.")
+            return True
         except Exception as e:
             self.log(f"ERRO AO SALVAR: {e}")
-            import traceback
             self.log(traceback.format_exc())
+            return False
     
+    def _feed_tasks(self, tasks):
+        """Produtor da fila de tarefas; a fila limitada aplica backpressure."""
+        for task in tasks:
+            if self.stop_event.is_set():
+                return
+            self.tasks_queue.put(task)
+
+    def _release_workers(self):
+        """Desbloqueia workers parados em `task_queue.get()` com uma sentinela cada.
+
+        A fila é esvaziada antes para que o produtor, se estiver bloqueado na
+        fila cheia, consiga terminar.
+        """
+        with contextlib.suppress(queue.Empty):
+            while True:
+                self.tasks_queue.get_nowait()
+        self.tasks_queue.put_sentinels(len(self.worker_threads))
+
     def stop_process(self):
         self.stop_event.set()
+        self._release_workers()
+        self._notify_manager()
         self.status_var.set("Finalizando...")
         self.log("\nSolicitação de parada recebida...")
 
@@ -498,32 +935,47 @@ class FrameworkGUI(tk.Tk):
         self.log("\nSinalizando para workers finalizarem...")
         if not self.stop_event.is_set():
             self.stop_event.set()
+            self._release_workers()
+            self._notify_manager()
+        # Junta os workers em paralelo e fora do lock: cada um precisa de
+        # threads_lock em _on_worker_exit para terminar.
         with self.threads_lock:
-            for thread in self.worker_threads:
-                if thread.is_alive():
-                    thread.join(timeout=5)
+            alive = [t for t in self.worker_threads if t.is_alive()]
+        if alive:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(alive)) as ex:
+                list(ex.map(lambda t: t.join(timeout=5), alive))
         
-        if getattr(self, 'unsaved_data', None):
+        if self.unsaved_idx:
             try:
                 self.save_data()
             except Exception:
                 pass
 
-        if hasattr(self, 'storage') and self.storage:
-            try:
-                self.storage.close()
-            except Exception:
-                pass
+        self._stop_writer()
 
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if 'chrome' in proc.info['name'].lower():
-                    self.log(f"Encerrando processo Chrome (PID: {proc.info['pid']})...")
-                    proc.kill()
+            if self.driver_pids.seen:
+                self._kill_driver_processes(self.driver_pids.drain())
+            else:
+                for proc in psutil.process_iter(['pid', 'name']):
+                    if 'chrome' in proc.info['name'].lower():
+                        self.log(f"Encerrando processo Chrome (PID: {proc.info['pid']})...")
+                        proc.kill()
         except Exception as e:
             self.log(f"Erro ao limpar processos chrome: {e}")
         self.log("Limpeza concluída.")
     
+    def _kill_driver_processes(self, pids):
+        """Encerra os drivers registrados e os navegadores filhos de cada um."""
+        for pid in pids:
+            with contextlib.suppress(psutil.Error):
+                driver_proc = psutil.Process(pid)
+                procs = driver_proc.children(recursive=True) + [driver_proc]
+                self.log(f"Encerrando driver (PID: {pid}) e {len(procs) - 1} processo(s) filho(s)...")
+                for proc in procs:
+                    with contextlib.suppress(psutil.Error):
+                        proc.kill()
+
     def on_closing(self):
         if messagebox.askokcancel("Sair", "Deseja realmente sair?"):
             self.stop_process()